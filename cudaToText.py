@@ -1,180 +1,386 @@
-import tkinter as tk
-from faster_whisper import WhisperModel
-import sounddevice as sd
+import os
 import numpy as np
 import threading
-import tempfile
-import os
-from scipy.io import wavfile
+import datetime
+import re
+import subprocess
 import queue
-from concurrent.futures import ThreadPoolExecutor
-import torch
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import shared_memory
+
+from settings import Config
+import recognizer
+from recognizer import preprocess_audio
+
+# The recognizer worker re-runs this script as __mp_main__, so the GUI,
+# audio-device and input-control libraries are only loaded in the main process
+if __name__ == "__main__":
+    import tkinter as tk
+    import sounddevice as sd
+
+    try:
+        import pyautogui
+        pyautogui.FAILSAFE = False
+        # Queried once instead of a display-server round trip per command
+        SCREEN_WIDTH, SCREEN_HEIGHT = pyautogui.size()
+    except ImportError:
+        print("PyAutoGUI not available - mouse control features disabled")
+        pyautogui = None
+        SCREEN_WIDTH, SCREEN_HEIGHT = 0, 0
 
-try:
-    import pyautogui
-    pyautogui.FAILSAFE = False
-except ImportError:
-    print("PyAutoGUI not available - mouse control features disabled")
-    pyautogui = None
 
 # Global configuration and constants
-SILENCE_THRESHOLD = 500
-SAMPLE_RATE = 48000
+config = Config()
+
+# One scan over the transcript; the matching group name selects the handler
+COMMAND_PATTERN = re.compile(
+    r"\b(?:(?P<move_mouse>move (?:the )?mouse)|(?P<exit_window>exit window|close window))")
 
 listening_event = threading.Event()
 
-executor = ThreadPoolExecutor(max_workers=4)
+# Recognition runs in a single worker process, started on the first Record
+# press, so inference never contends with the audio thread for the GIL
+executor = None
+dispatcher_thread = None
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
+# Finished utterances wait here, in shared memory, until the worker is free
+utterance_queue = queue.Queue()
 
-print("Loading Whisper model...")
-model = WhisperModel("small.en", device=device, compute_type="int8")
-print("Model loaded!")
+# Recordings are archived by a background writer so ffmpeg never delays a result
+save_queue = queue.Queue()
 
 
-def preprocess_audio(audio_data, sample_rate=16000):
-    try:
-        audio_float = audio_data.astype(np.float32) / 32768.0
-        audio_float *= 2
-        np.clip(audio_float, -1.0, 1.0, out=audio_float)
-        audio_processed = (audio_float * 32767).astype(np.int16)
-        return audio_processed
-    except Exception as e:
-        print(f"Error in audio preprocessing: {e}")
-        return audio_data
+def peak_amplitude(samples):
+    # Two int16 reductions, no np.abs() temporary; int() avoids -(-32768) overflow
+    return max(int(samples.max()), -int(samples.min()))
+
+
+def move_mouse(command):
+    if "top right" in command:
+        status_label.after(0, lambda: status_label.config(text="Moving mouse to top right"))
+        pyautogui.moveTo(SCREEN_WIDTH - 1, 0, duration=0.5)
+    else:
+        status_label.after(0, lambda: status_label.config(text="Moving mouse to default icon position"))
+        icon_x, icon_y = 200, 200
+        pyautogui.moveTo(icon_x, icon_y, duration=0.5)
+    return True
+
+
+def exit_window(command):
+    status_label.after(0, lambda: status_label.config(text="Exiting current window"))
+    pyautogui.hotkey("alt", "f4")
+    return True
+
+
+# Checked in this order when a transcript names more than one command
+COMMAND_HANDLERS = {
+    "move_mouse": move_mouse,
+    "exit_window": exit_window,
+}
 
 
 def process_voice_command(command):
     command = command.lower().strip()
     print(f"Processing command: {command}")
-    move_mouse_commands = ["move mouse", "move the mouse"]
-    exit_commands = ["exit window", "close window"]
+    found = {match.lastgroup for match in COMMAND_PATTERN.finditer(command)}
+    handler = next((handler for name, handler in COMMAND_HANDLERS.items() if name in found), None)
+    if handler is None:
+        return False
 
     try:
-        if any(cmd in command for cmd in move_mouse_commands):
-            if "top right" in command:
-                status_label.after(0, lambda: status_label.config(text="Moving mouse to top right"))
-                screen_width, _ = pyautogui.size()
-                pyautogui.moveTo(screen_width - 1, 0, duration=0.5)
-                return True
-            else:
-                status_label.after(0, lambda: status_label.config(text="Moving mouse to default icon position"))
-                icon_x, icon_y = 200, 200
-                pyautogui.moveTo(icon_x, icon_y, duration=0.5)
-                return True
-
-        if any(cmd in command for cmd in exit_commands):
-            status_label.after(0, lambda: status_label.config(text="Exiting current window"))
-            pyautogui.hotkey("alt", "f4")
-            return True
-
-        return False
+        return handler(command)
 
     except Exception as e:
         print(f"Error in command processing: {e}")
-        status_label.after(0, lambda: status_label.config(text=f"Command error: {str(e)}"))
+        message = f"Command error: {str(e)}"
+        status_label.after(0, lambda: status_label.config(text=message))
         return False
 
 
-def save_and_process_audio(audio_data):
+def save_recording_as_mp3(audio_data, recognized_text, timestamp):
+    base_path = os.path.join(config.recordings_dir, f"recording_{timestamp}")
+    mp3_path = f"{base_path}.mp3"
     try:
-        processed_audio = preprocess_audio(audio_data)
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio_file:
-            temp_filename = temp_audio_file.name
-            wavfile.write(temp_filename, SAMPLE_RATE, processed_audio)
-
-        print("Processing audio with Whisper...")
-        segments, _ = model.transcribe(
-            temp_filename,
-            beam_size=5,
-            language="en",
-            condition_on_previous_text=True,
-            no_speech_threshold=0.3
-        )
-        text = " ".join([segment.text for segment in segments])
-        if text.strip():
-            print(f"Recognized text: {text}")
-            status_label.after(0, lambda: status_label.config(text=f"You said: {text}"))
-            process_voice_command(text)
-        else:
-            print("No speech detected")
-            status_label.after(0, lambda: status_label.config(text="No speech detected"))
-
-        os.unlink(temp_filename)
+        os.makedirs(config.recordings_dir, exist_ok=True)
+        # Raw PCM goes straight into ffmpeg's stdin, no intermediate WAV file.
+        # A byte view of the array avoids the full copy tobytes() would make.
+        # -n and mode 'x' refuse to overwrite an existing recording
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-n",
+                        "-f", "s16le", "-ar", str(config.sample_rate), "-ac", "1", "-i", "pipe:0",
+                        "-b:a", config.mp3_bitrate, mp3_path],
+                       input=memoryview(audio_data).cast("B"), check=True,
+                       timeout=config.mp3_timeout_seconds)
+        with open(f"{base_path}.txt", 'x', encoding='utf-8') as f:
+            f.write(recognized_text)
+        return mp3_path
+    except Exception as e:
+        print(f"Error saving recording: {e}")
+        return None
+
 
+def save_worker():
+    while True:
+        audio_data, recognized_text, timestamp = save_queue.get()
+        try:
+            save_recording_as_mp3(preprocess_audio(audio_data), recognized_text, timestamp)
+        finally:
+            save_queue.task_done()
+
+
+def submit_utterance(audio_data):
+    shm = shared_memory.SharedMemory(create=True, size=audio_data.nbytes)
+    np.ndarray(audio_data.shape, dtype=np.int16, buffer=shm.buf)[:] = audio_data
+    utterance_queue.put((shm, len(audio_data)))
+
+
+def release_utterance(shm, length):
+    try:
+        return np.ndarray((length,), dtype=np.int16, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def handle_recognition(audio_data, text):
+    if text.strip():
+        print(f"Recognized text: {text}")
+        status_label.after(0, lambda: status_label.config(text=f"You said: {text}"))
+        # Named when recognized, not when written; microseconds keep the
+        # utterances of one batch from sharing a name
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        save_queue.put((audio_data, text, timestamp))
+        if not process_voice_command(text):
+            print("Command not recognized")
+            status_label.after(0, lambda: status_label.config(text=f"Command not recognized: {text}"))
+    else:
+        print("No speech detected")
+        status_label.after(0, lambda: status_label.config(text="No speech detected"))
+
+
+def recognition_dispatcher():
+    # Runs until a None sentinel arrives at shutdown. Every utterance it takes
+    # off the queue is released, even when recognition fails.
+    while True:
+        batch = [utterance_queue.get()]
+        # Whatever queued up while the previous batch was running goes together
+        while len(batch) < config.max_batch_size and batch[-1] is not None:
+            try:
+                batch.append(utterance_queue.get_nowait())
+            except queue.Empty:
+                break
+        stopping = batch[-1] is None
+        if stopping:
+            batch.pop()
+
+        texts = None
+        try:
+            # At shutdown the executor is already gone; just release the batch
+            if batch and not stopping:
+                future = executor.submit(recognizer.recognize_batch, [(shm.name, length) for shm, length in batch])
+                texts = future.result()
+        except Exception as e:
+            print(f"Error in audio processing: {e}")
+            message = f"Processing error: {str(e)}"
+            status_label.after(0, lambda: status_label.config(text=message))
+        finally:
+            utterances = [release_utterance(shm, length) for shm, length in batch]
+
+        if texts is not None:
+            for audio_data, text in zip(utterances, texts):
+                try:
+                    handle_recognition(audio_data, text)
+                except Exception as e:
+                    print(f"Error in audio processing: {e}")
+
+        if stopping:
+            # Utterances still waiting would otherwise leak in /dev/shm
+            while True:
+                try:
+                    shm, length = utterance_queue.get_nowait()
+                except queue.Empty:
+                    return
+                release_utterance(shm, length)
+
+
+def handle_recognizer_ready(future):
+    try:
+        future.result()
     except Exception as e:
-        print(f"Error in audio processing: {e}")
-        status_label.after(0, lambda: status_label.config(text=f"Processing error: {str(e)}"))
+        print(f"Error loading model: {e}")
+        message = f"Model error: {str(e)}"
+        status_label.after(0, lambda: status_label.config(text=message))
+
+
+def start_recognizer():
+    global executor, dispatcher_thread
+    if executor is None:
+        # Spawn rather than fork: the parent already runs Tk and PortAudio threads
+        executor = ProcessPoolExecutor(max_workers=1,
+                                       mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=recognizer.init_recognizer,
+                                       initargs=(config,))
+        # Spawns the worker now so the model loads while the user starts speaking
+        executor.submit(recognizer.recognizer_ready).add_done_callback(handle_recognizer_ready)
+        dispatcher_thread = threading.Thread(target=recognition_dispatcher, daemon=True)
+        dispatcher_thread.start()
 
 
 class AudioProcessor:
-    def __init__(self):
+    def __init__(self, config):
+        self.config = config
         self.audio_queue = queue.Queue()
-        self.audio_buffer = []
+        self.slots = [np.empty(config.chunk, dtype=np.int16) for _ in range(config.audio_slots)]
+        self.next_slot = 0
+        self.utterance = np.empty(config.sample_rate * config.max_utterance_seconds, dtype=np.int16)
+        self.utterance_len = 0
+        self.speech_end = 0
+        self.tail_padding = config.sample_rate * config.tail_padding_ms // 1000
         self.recording_active = False
-        self.silence_count = 0
-        self.energy_threshold = SILENCE_THRESHOLD
+        # Set after an overflow: audio is dropped until the noise goes quiet
+        self.discarding = False
+        self.silence_samples = 0
+        self.energy_threshold = config.silence_threshold
+        self.vad_hop = config.sample_rate * config.vad_hop_ms // 1000
+        self.end_silence_samples = config.sample_rate * config.end_silence_ms // 1000
+        self.vad_frame = np.empty(self.vad_hop, dtype=np.int16)
+        self.vad_fill = 0
+        self.stream = None
 
     def audio_callback(
         self, indata, frames, time_info, status):
         if status:
             print(f"Audio callback status: {status}")
         if listening_event.is_set():
-            self.audio_queue.put(indata.copy().flatten())
+            # One slot is kept back for the block the consumer is reading
+            if self.audio_queue.qsize() >= len(self.slots) - 1:
+                # Writing now would corrupt a slot the consumer has not read
+                # yet, so this block is lost instead
+                print("Audio overrun - consumer fell behind, block dropped")
+                return
+            # Copy into the next preallocated slot and pass only its index, so
+            # the real-time thread never allocates sample buffers. blocksize is
+            # fixed, so every callback fills exactly one slot.
+            np.copyto(self.slots[self.next_slot], np.frombuffer(indata, dtype=np.int16, count=frames))
+            self.audio_queue.put(self.next_slot)
+            self.next_slot = (self.next_slot + 1) % len(self.slots)
+
+    def start(self):
+        # The stream stays open for the lifetime of the app; toggling only
+        # gates the callback through listening_event.
+        if self.stream is not None:
+            return
+        print("Starting audio stream...")
+        # Raw stream: the callback gets a plain buffer instead of a fresh
+        # numpy array with dtype inference on every block
+        self.stream = sd.RawInputStream(callback=self.audio_callback,
+                                        channels=1,
+                                        samplerate=self.config.sample_rate,
+                                        blocksize=self.config.chunk,
+                                        dtype='int16',
+                                        latency='low')
+        self.stream.start()
+        threading.Thread(target=self.process_audio, daemon=True).start()
+        print("Audio stream started")
+
+    def flush(self):
+        # Wakes the consumer so it drops any partial utterance and VAD state
+        self.audio_queue.put(None)
+
+    def reset(self):
+        self.utterance_len = 0
+        self.speech_end = 0
+        self.recording_active = False
+        self.discarding = False
+        self.silence_samples = 0
+        self.vad_fill = 0
+
+    def append_audio(self, block):
+        end = self.utterance_len + len(block)
+        if end > len(self.utterance):
+            # Runaway capture (background noise, music): never transcribe it,
+            # including whatever is left of it once the buffer is dropped
+            print("Utterance too long - discarded")
+            self.utterance_len = 0
+            self.discarding = True
+            return
+        self.utterance[self.utterance_len:end] = block
+        self.utterance_len = end
+
+    def dispatch_utterance(self):
+        length = min(self.utterance_len, self.speech_end + self.tail_padding)
+        if length:
+            print("Processing recorded audio...")
+            submit_utterance(self.utterance[:length])
+        self.utterance_len = 0
+
+    def detect_speech(self, block):
+        # Feeds the block through the hop-based VAD; returns True once
+        # end_silence_ms of quiet has followed detected speech.
+        utterance_done = False
+        offset = 0
+        while offset < len(block):
+            take = min(self.vad_hop - self.vad_fill, len(block) - offset)
+            self.vad_frame[self.vad_fill:self.vad_fill + take] = block[offset:offset + take]
+            self.vad_fill += take
+            offset += take
+            if self.vad_fill < self.vad_hop:
+                continue
+
+            self.vad_fill = 0
+            energy = peak_amplitude(self.vad_frame)
+            if energy > self.energy_threshold:
+                if not self.recording_active:
+                    print("Speech detected!")
+                    self.recording_active = True
+                self.silence_samples = 0
+                # The block is appended at utterance_len, so this is where speech last ended
+                self.speech_end = self.utterance_len + offset
+            elif self.recording_active:
+                self.silence_samples += self.vad_hop
+                if self.silence_samples >= self.end_silence_samples:
+                    utterance_done = True
+        return utterance_done
 
     def process_audio(self):
-        CHUNK = 4096
-        MAX_SILENCE_CHUNKS = 8
-
-        try:
-            print("Starting audio stream...")
-            with sd.InputStream(callback=self.audio_callback,
-                                channels=1,
-                                samplerate=SAMPLE_RATE,
-                                blocksize=CHUNK,
-                                dtype=np.int16,
-                                latency='low') as stream:
-                print("Audio stream started")
-                while listening_event.is_set():
-                    try:
-                        current_audio = self.audio_queue.get(timeout=0.05)
-                    except queue.Empty:
-                        continue
-
-                    energy = np.max(np.abs(current_audio))
-                    if energy > self.energy_threshold:
-                        if not self.recording_active:
-                            print("Speech detected!")
-                            self.recording_active = True
-                            self.silence_count = 0
-                        self.audio_buffer.append(current_audio)
-                    elif self.recording_active:
-                        self.audio_buffer.append(current_audio)
-                        self.silence_count += 1
-                        if self.silence_count >= MAX_SILENCE_CHUNKS:
-                            complete_audio = np.concatenate(self.audio_buffer)
-                            print("Processing recorded audio...")
-                            # Submit the processing task to the thread pool
-                            executor.submit(save_and_process_audio, complete_audio)
-                            self.audio_buffer = []
-                            self.recording_active = False
-                            self.silence_count = 0
-
-        except Exception as e:
-            print(f"Error in audio recording: {e}")
-            status_label.after(0, lambda: status_label.config(text=f"Recording error: {str(e)}"))
+        while True:
+            # Blocks until the callback delivers a block or flush() is called,
+            # so the thread sleeps while not listening
+            slot = self.audio_queue.get()
+            # A callback that passed its is_set() check just before Stop can
+            # still deliver a block; it must not start an utterance
+            if slot is None or not listening_event.is_set():
+                self.reset()
+                continue
+
+            current_audio = self.slots[slot]
+            try:
+                was_recording = self.recording_active
+                utterance_done = self.detect_speech(current_audio)
+                if (was_recording or self.recording_active) and not self.discarding:
+                    self.append_audio(current_audio)
+                if utterance_done:
+                    if not self.discarding:
+                        self.dispatch_utterance()
+                    self.reset()
+
+            except Exception as e:
+                print(f"Error in audio recording: {e}")
+                message = f"Recording error: {str(e)}"
+                status_label.after(0, lambda: status_label.config(text=message))
 
 
 def toggle_record():
     if not listening_event.is_set():
         try:
+            start_recognizer()
+            audio_processor.start()
+            # Whatever the last session left behind is dropped before new audio
+            audio_processor.flush()
             listening_event.set()
             status_label.config(text="Listening... (Speak now)")
             record_button.config(text="Stop Recording")
-            audio_processor = AudioProcessor()
-            recording_thread = threading.Thread(target=audio_processor.process_audio, daemon=True)
-            recording_thread.start()
-            print("Recording thread started")
+            print("Listening started")
         except Exception as e:
             print(f"Error starting recording: {e}")
             status_label.config(text=f"Error: {str(e)}")
@@ -182,20 +388,41 @@ def toggle_record():
             listening_event.clear()
     else:
         listening_event.clear()
+        audio_processor.flush()
         record_button.config(text="Record")
         status_label.config(text="Stopped listening")
         print("Stopped listening")
 
 
-# Set up the main Tkinter window
-root = tk.Tk()
-root.title("Voice to Text Demo")
-root.geometry("400x200")
+# Guarded so the recognizer worker can import this module without opening a window
+if __name__ == "__main__":
+    audio_processor = AudioProcessor(config)
+    threading.Thread(target=save_worker, daemon=True).start()
+
+    # Set up the main Tkinter window
+    root = tk.Tk()
+    root.title("Voice to Text Demo")
+    root.geometry("400x200")
 
-status_label = tk.Label(root, text="Press the button and speak.", wraplength=300)
-status_label.pack(pady=20)
+    status_label = tk.Label(root, text="Press the button and speak.", wraplength=300)
+    status_label.pack(pady=20)
 
-record_button = tk.Button(root, text="Record", command=toggle_record)
-record_button.pack()
+    record_button = tk.Button(root, text="Record", command=toggle_record)
+    record_button.pack()
 
-root.mainloop()
+    try:
+        audio_processor.start()
+    except Exception as e:
+        print(f"Error in audio recording: {e}")
+        status_label.config(text=f"Recording error: {str(e)}")
+
+    root.mainloop()
+
+    listening_event.clear()
+    if executor is not None:
+        # Waits for the batch in flight; the dispatcher then releases the
+        # shared memory of everything it still holds and exits
+        executor.shutdown(cancel_futures=True)
+        utterance_queue.put(None)
+        dispatcher_thread.join()
+    save_queue.join()
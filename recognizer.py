@@ -0,0 +1,285 @@
+"""Speech recognition side of cudaToText.py.
+
+Loaded by the recognizer worker process that cudaToText.py spawns, and kept
+free of the GUI, audio-device and input-control libraries so the worker does
+not load them. Utterances arrive through shared memory.
+"""
+import os
+
+from settings import PHYSICAL_CORES
+
+# CTranslate2 and torch read these when they load, so they are set before the
+# imports below. Half the logical cores approximates the physical count: int8
+# matmuls on AVX-VNNI CPUs scale to about one thread per physical core, and
+# hyperthreads beyond that only contend with the audio thread. KMP_BLOCKTIME=0
+# stops idle OpenMP workers spinning between utterances.
+os.environ.setdefault("OMP_NUM_THREADS", str(PHYSICAL_CORES))
+os.environ.setdefault("KMP_BLOCKTIME", "0")
+
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.feature_extractor import FeatureExtractor
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+import numpy as np
+import bisect
+import functools
+from scipy import signal
+from multiprocessing import shared_memory
+import torch
+
+try:
+    from numba import njit
+except ImportError:
+    print("Numba not available - using numpy audio preprocessing")
+    njit = None
+
+# Biases the decoder toward the small, known command vocabulary
+COMMAND_PROMPT = "move mouse top right exit window close window"
+
+# Greedy, deterministic decoding shared by the single and batched paths
+DECODE_OPTIONS = {
+    "beam_size": 1,
+    "best_of": 1,
+    "temperature": 0.0,
+    "language": "en",
+    "without_timestamps": True,
+    "initial_prompt": COMMAND_PROMPT,
+    "condition_on_previous_text": False,
+    "no_speech_threshold": 0.6,
+}
+# Silero VAD drops non-speech (coughs, clicks) before the encoder runs
+VAD_OPTIONS = VadOptions(min_silence_duration_ms=500)
+
+# Custom openWakeWord models, named after the command text they stand for
+KEYWORD_DIR = "keyword_models"
+KEYWORD_COMMANDS = {
+    "move_mouse_top_right": "move mouse top right",
+    "move_mouse": "move mouse",
+    "exit_window": "exit window",
+    "close_window": "close window",
+}
+KEYWORD_CONFIDENCE = 0.8
+KEYWORD_FRAME = 1280
+
+# Input gain applied before recognition and archiving
+AUDIO_GAIN = 2.0
+
+# Whisper and openWakeWord both consume 16 kHz mono
+MODEL_SAMPLE_RATE = 16000
+
+COMPUTE_TYPE_FALLBACKS = ("int8_float16", "int8", "default")
+
+class TorchFeatureExtractor(FeatureExtractor):
+    # Same log-mel features as faster-whisper, but the STFT and mel projection
+    # run through torch (MKL/pocketfft) with the window and filterbank cached.
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.mel_filters_tensor = torch.from_numpy(self.mel_filters)
+        self.window = torch.hann_window(self.n_fft)
+
+    def __call__(self, waveform, padding=160, chunk_length=None):
+        # torch.stft's reflect padding must be shorter than the input; the
+        # numpy path has no such limit, so very short clips go through it
+        if len(waveform) + padding <= self.n_fft // 2:
+            return super().__call__(waveform, padding, chunk_length)
+
+        if chunk_length is not None:
+            self.n_samples = chunk_length * self.sampling_rate
+            self.nb_max_frames = self.n_samples // self.hop_length
+
+        audio = torch.from_numpy(np.ascontiguousarray(waveform, dtype=np.float32))
+        if padding:
+            audio = torch.nn.functional.pad(audio, (0, padding))
+
+        with torch.no_grad():
+            stft = torch.stft(audio, self.n_fft, self.hop_length,
+                              window=self.window, return_complex=True)
+            magnitudes = stft[..., :-1].abs() ** 2
+            mel_spec = self.mel_filters_tensor @ magnitudes
+            log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+            log_spec = torch.maximum(log_spec, log_spec.max() - 8.0)
+            log_spec = (log_spec + 4.0) / 4.0
+        return log_spec.numpy()
+
+
+@functools.lru_cache(maxsize=None)
+def get_model(model_size, compute_type):
+    # A pre-quantized local copy loads without re-quantizing the weights
+    model_path = os.path.join(config.models_dir, f"{model_size}-{config.model_quantization}")
+    if not os.path.isdir(model_path):
+        model_path = model_size
+
+    compute_types = [compute_type]
+    compute_types += [t for t in COMPUTE_TYPE_FALLBACKS if t != compute_type]
+    for candidate in compute_types:
+        try:
+            whisper_model = WhisperModel(model_path,
+                                         device=config.device,
+                                         compute_type=candidate,
+                                         cpu_threads=config.cpu_threads,
+                                         num_workers=config.num_workers)
+        except ValueError as e:
+            print(f"Compute type {candidate} unavailable: {e}")
+            continue
+        whisper_model.feature_extractor = TorchFeatureExtractor(**whisper_model.feat_kwargs)
+        print(f"Loaded {model_path} with compute type {candidate}")
+        return whisper_model
+    raise RuntimeError("No supported compute type for the Whisper model")
+
+
+def load_keyword_model():
+    try:
+        from openwakeword.model import Model as KeywordModel
+    except ImportError:
+        print("openWakeWord not available - keyword spotting disabled")
+        return None
+    paths = [os.path.join(KEYWORD_DIR, f"{name}.onnx") for name in KEYWORD_COMMANDS]
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        print("No keyword models found - every utterance goes to Whisper")
+        return None
+    return KeywordModel(wakeword_models=paths, inference_framework="onnx")
+
+
+# Only populated inside the recognizer worker process, by init_recognizer
+config = None
+model = None
+batched_model = None
+keyword_model = None
+
+
+def init_recognizer(worker_config):
+    global config, model, batched_model, keyword_model
+    config = worker_config
+    print("Loading Whisper model...")
+    model = get_model(config.model_size, config.compute_type)
+    batched_model = BatchedInferencePipeline(model=model)
+    keyword_model = load_keyword_model()
+    print("Model loaded!")
+
+
+def recognizer_ready():
+    return model is not None
+
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _amplify(audio_data, scale):
+        # Single pass: scale, clip and convert back to int16
+        out = np.empty_like(audio_data)
+        for i in range(audio_data.size):
+            v = audio_data[i] * scale
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32767.0:
+                v = -32767.0
+            out[i] = np.int16(v)
+        return out
+else:
+    def _amplify(audio_data, scale):
+        audio_float = audio_data.astype(np.float32)
+        audio_float *= scale
+        np.clip(audio_float, -32767.0, 32767.0, out=audio_float)
+        return audio_float.astype(np.int16)
+
+
+def preprocess_audio(audio_data, sample_rate=16000):
+    try:
+        # Same as normalising to [-1, 1], applying the gain, clipping and
+        # rescaling by 32767, folded into one scale factor
+        return _amplify(audio_data, AUDIO_GAIN * 32767.0 / 32768.0)
+    except Exception as e:
+        print(f"Error in audio preprocessing: {e}")
+        return audio_data
+
+
+def to_model_input(audio_data):
+    audio = audio_data.astype(np.float32)
+    audio /= 32768.0
+    if config.sample_rate != MODEL_SAMPLE_RATE:
+        # Polyphase FIR resampling, e.g. 48 kHz -> 16 kHz is up=1, down=3
+        audio = signal.resample_poly(audio, MODEL_SAMPLE_RATE, config.sample_rate).astype(np.float32, copy=False)
+    return audio
+
+
+def spot_keyword(audio):
+    if keyword_model is None:
+        return None
+    audio_16k = np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+    fired = set()
+    keyword_model.reset()
+    for start in range(0, len(audio_16k) - KEYWORD_FRAME + 1, KEYWORD_FRAME):
+        scores = keyword_model.predict(audio_16k[start:start + KEYWORD_FRAME])
+        fired.update(name for name, score in scores.items() if score > KEYWORD_CONFIDENCE)
+    if not fired:
+        return None
+    # "move mouse" also fires inside "move mouse top right"; keep the most specific phrase
+    return max((KEYWORD_COMMANDS[name] for name in fired), key=len)
+
+
+def read_utterance(shm_name, length):
+    # The utterance arrives through shared memory rather than being pickled
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        audio_data = np.ndarray((length,), dtype=np.int16, buffer=shm.buf)
+        model_input = to_model_input(preprocess_audio(audio_data))
+        del audio_data
+    finally:
+        shm.close()
+    return model_input
+
+
+def transcribe(model_input):
+    # faster-whisper would still run the encoder on the empty remainder when
+    # Silero finds no speech, so a cough or click stops here instead
+    if not get_speech_timestamps(model_input, VAD_OPTIONS, sampling_rate=MODEL_SAMPLE_RATE):
+        return ""
+    print("Processing audio with Whisper...")
+    segments, _ = model.transcribe(model_input, vad_filter=True, vad_parameters=VAD_OPTIONS,
+                                   **DECODE_OPTIONS)
+    return " ".join([segment.text for segment in segments])
+
+
+def transcribe_batch(model_inputs):
+    # clip_timestamps makes the batched pipeline skip its own VAD, so run
+    # Silero here and leave utterances without speech out of the batch
+    voiced = [i for i, audio in enumerate(model_inputs)
+              if get_speech_timestamps(audio, VAD_OPTIONS, sampling_rate=MODEL_SAMPLE_RATE)]
+    texts = [[] for _ in model_inputs]
+    if voiced:
+        # Lay the utterances end to end, one clip each, so the encoder runs
+        # over all of them as a single padded batch. Segments are mapped back
+        # to their utterance by start time.
+        print(f"Processing {len(voiced)} utterances with Whisper...")
+        offsets = np.cumsum([0] + [len(model_inputs[i]) for i in voiced])
+        clips = [{"start": int(start), "end": int(end)} for start, end in zip(offsets[:-1], offsets[1:])]
+        segments, _ = batched_model.transcribe(
+            np.concatenate([model_inputs[i] for i in voiced]),
+            clip_timestamps=clips,
+            batch_size=len(voiced),
+            **DECODE_OPTIONS
+        )
+        # Segment times are rounded to the millisecond, so allow for that
+        starts = [start / MODEL_SAMPLE_RATE - 0.001 for start in offsets[:-1]]
+        for segment in segments:
+            texts[voiced[bisect.bisect_right(starts, segment.start) - 1]].append(segment.text)
+    return [" ".join(parts) for parts in texts]
+
+
+def recognize_batch(utterances):
+    # Runs in the worker process; returns one transcript per (shm_name, length)
+    model_inputs = [read_utterance(shm_name, length) for shm_name, length in utterances]
+    texts = []
+    for model_input in model_inputs:
+        text = spot_keyword(model_input)
+        if text:
+            print(f"Keyword detected: {text}")
+        texts.append(text)
+
+    pending = [i for i, text in enumerate(texts) if not text]
+    if len(pending) == 1:
+        texts[pending[0]] = transcribe(model_inputs[pending[0]])
+    elif pending:
+        batch_texts = transcribe_batch([model_inputs[i] for i in pending])
+        for i, text in zip(pending, batch_texts):
+            texts[i] = text
+    return texts
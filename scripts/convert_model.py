@@ -0,0 +1,32 @@
+"""Convert a Whisper checkpoint to a pre-quantized CTranslate2 model.
+
+recognizer.py loads models/<size>-<quantization> (Config.model_quantization,
+int8 by default) when that directory exists, which skips the weight
+quantization faster-whisper otherwise performs on every start.
+Requires the transformers and torch packages in addition to ctranslate2.
+
+Usage:
+    python scripts/convert_model.py [--model small.en] [--quantization int8]
+"""
+import argparse
+import os
+
+from ctranslate2.converters import TransformersConverter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="small.en", help="Whisper size, e.g. small.en")
+    parser.add_argument("--quantization", default="int8", help="CTranslate2 quantization type")
+    parser.add_argument("--output-dir", help="defaults to models/<model>-<quantization>")
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or os.path.join("models", f"{args.model}-{args.quantization}")
+    converter = TransformersConverter(f"openai/whisper-{args.model}",
+                                      copy_files=["tokenizer.json", "preprocessor_config.json"])
+    converter.convert(output_dir, quantization=args.quantization, force=True)
+    print(f"Wrote {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Settings shared by cudaToText.py and its recognizer worker process."""
+import os
+from dataclasses import dataclass
+
+# Half the logical cores approximates the physical core count
+PHYSICAL_CORES = max(1, (os.cpu_count() or 2) // 2)
+
+
+@dataclass(slots=True, frozen=True)
+class Config:
+    sample_rate: int = 16000
+    silence_threshold: int = 500
+    chunk: int = 512
+    # Preallocated capture blocks the audio callback cycles through
+    audio_slots: int = 64
+    # Energy VAD runs on fixed hops, independent of the capture block size
+    vad_hop_ms: int = 20
+    end_silence_ms: int = 300
+    # Audio kept after the last loud hop; the rest of the trailing silence is cut
+    tail_padding_ms: int = 200
+    # Longer captures are treated as noise and discarded
+    max_utterance_seconds: int = 15
+    recordings_dir: str = "voice_recordings"
+    mp3_bitrate: str = "128k"
+    # A hung ffmpeg is killed after this long so the save worker keeps draining
+    mp3_timeout_seconds: float = 10.0
+    model_size: str = "small.en"
+    # scripts/convert_model.py writes pre-quantized models here, as
+    # <model_size>-<model_quantization>
+    models_dir: str = "models"
+    model_quantization: str = "int8"
+    device: str = "auto"
+    # "auto" lets CTranslate2 pick the fastest type the host supports. An
+    # explicit type (e.g. "int8_float16") is tried first and falls back down
+    # recognizer.COMPUTE_TYPE_FALLBACKS.
+    compute_type: str = "auto"
+    cpu_threads: int = PHYSICAL_CORES
+    num_workers: int = 1
+    # Utterances queued while the worker is busy are transcribed together
+    max_batch_size: int = 8